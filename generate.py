@@ -1,11 +1,21 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
-import xml.etree.ElementTree as ET
+from lxml import etree as ET # libxml2-backed: faster parsing, find() and serialization than stdlib ElementTree
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import lru_cache
+from contextlib import nullcontext
 from io import BytesIO
-from PIL import Image, ImageOps, ImageDraw, ImageFont
+from PIL import Image, ImageDraw, ImageFont, ImageColor
 import csv
 import re
 import html
+import hashlib
+import json
+import threading
+import math
+from xml.sax.saxutils import escape
 
 # --- 1. CONFIGURATION ---
 
@@ -13,6 +23,16 @@ import html
 OUTPUT_DIR = "generated_ads" 
 MAX_PRODUCTS_TO_GENERATE = 50 
 TEMP_DOWNLOAD_DIR = "temp_xml_feeds" # New directory for source XML downloads
+IMAGE_CACHE_DIR = "image_cache" # Downloaded product images, keyed by URL hash, reused on re-runs
+AD_CACHE_DIR = "ad_render_cache" # Render keys of the existing ads; kept out of the published generated_ads folder
+# Bump whenever a code change alters how ads are drawn, so every ad is re-rendered once.
+# Edits elsewhere in this script (feeds, logging, comments) leave existing ads valid.
+RENDER_VERSION = 1
+MAX_IMAGE_BYTES = 8 * 1024 * 1024 # Larger source images are skipped (left blank) instead of downloaded
+MAX_AD_WORKERS = 8 # Ads are rendered in parallel worker processes (image downloads + Pillow work overlap)
+# JPEG encoder settings for the ads: 4:2:0 chroma subsampling and no extra Huffman
+# optimization pass keep encode time and file size down at no visible cost.
+JPEG_SAVE_OPTIONS = {"quality": 90, "subsampling": 2, "optimize": False, "progressive": False}
 
 # 🟢 IMPORTANT: Centralized configuration for all countries
 COUNTRY_CONFIGS = {
@@ -52,6 +72,20 @@ NAMESPACES = {
 }
 NS = NAMESPACES # Alias for cleaner use in contamination report
 
+# Fully-qualified (Clark notation) g: tags, so item.find() is a plain tag match
+# instead of parsing a prefixed path against the namespace map on every call
+G_TAG_PREFIX = '{' + NAMESPACES['g'] + '}'
+G_ID = G_TAG_PREFIX + 'id'
+G_TITLE = G_TAG_PREFIX + 'title'
+G_DESCRIPTION = G_TAG_PREFIX + 'description'
+G_LINK = G_TAG_PREFIX + 'link'
+G_GOOGLE_PRODUCT_CATEGORY = G_TAG_PREFIX + 'google_product_category'
+G_CATEGORY = G_TAG_PREFIX + 'category'
+G_SALE_PRICE = G_TAG_PREFIX + 'sale_price'
+G_PRICE = G_TAG_PREFIX + 'price'
+G_IMAGE_LINK = G_TAG_PREFIX + 'image_link'
+G_ADDITIONAL_IMAGE_LINK = G_TAG_PREFIX + 'additional_image_link'
+
 # Define color constants
 NORMAL_PRICE_COLOR = "#0055FF" 
 SALE_PRICE_COLOR = "#cc02d2" 
@@ -77,56 +111,284 @@ LAYOUT_CONFIG = {
     }
 }
 
+# Slot geometry as plain tuples, resolved once: ((x, y) paste offset, (w, h) size, vertical centering).
+# The size tuples are also reused as load_slot_image's cache key.
+SLOT_PLACEMENTS = tuple(
+    ((slot["x"], slot["y"]), (slot["w"], slot["h"]), slot.get("center_y", 0.5))
+    for slot in LAYOUT_CONFIG["slots"]
+)
+
+# 1.3. Preloaded Design Assets
+# The template and price font are identical for every ad, so decode/load them once
+# and hand each ad a copy of the template instead of re-reading the PNG per product.
+# The ads are saved as JPEG, so the canvas is kept in RGB from the start: three
+# channels per paste and text draw, and no RGBA -> RGB flattening before the encode.
+try:
+    TEMPLATE_IMAGE = Image.open(LAYOUT_CONFIG["template_path"]).convert("RGB")
+except FileNotFoundError:
+    TEMPLATE_IMAGE = Image.new('RGB', LAYOUT_CONFIG["canvas_size"], (255, 255, 255))
+
+try:
+    PRICE_FONT = ImageFont.truetype(LAYOUT_CONFIG["price"]["font_path"], LAYOUT_CONFIG["price"]["font_size"])
+except (OSError, ImportError):
+    PRICE_FONT = ImageFont.load_default()
+
+# 1.4. Shared HTTP Session
+# One pooled keep-alive session for all feed and image downloads, so repeated
+# requests to the same host reuse TCP/TLS connections instead of reconnecting.
+# Each process builds its own session (ad workers in init_ad_worker), so the per-host
+# pool only has to cover one process's in-flight requests: the main process downloads
+# every country's feed at once, and an ad worker renders one ad at a time, fetching
+# at most one image per slot in parallel.
+def create_http_session():
+    """Builds a pooled, retrying requests session."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=max(len(COUNTRY_CONFIGS), len(SLOT_PLACEMENTS)),
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(500, 502, 503, 504))
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+SESSION = create_http_session()
+
 # --- 2. HELPER FUNCTIONS ---
 
+HTML_TAG_PATTERN = re.compile('<[^>]*>')
+BOILERPLATE_SUFFIX = 'Vaata lähemalt ballzy.eu.'
+
 def clean_text(text):
     """Removes HTML tags and decodes HTML entities (like &hellip;) from a string."""
     if not text:
         return ""
         
     text = html.unescape(text)
-    clean = re.sub('<[^>]*>', '', text)
-    clean = clean.replace('Vaata lähemalt ballzy.eu.', '').strip()
+    clean = HTML_TAG_PATTERN.sub('', text)
+    clean = clean.replace(BOILERPLATE_SUFFIX, '').strip()
     
     return clean
 
+@lru_cache(maxsize=4096)
+def format_price_text(raw_price_str, currency):
+    """Formats a raw feed price token ("89.00") for display ("89€"); memoized since many products share a price."""
+    currency_symbol = currency.replace("EUR", "€") 
+    # Fast path for the usual "NN" / "NN.NN" prices: integer euros and cents, no float round-trip
+    euros, _, cents = raw_price_str.partition('.')
+    if raw_price_str.isascii() and euros.isdigit() and len(cents) <= 2 and (cents.isdigit() or not cents):
+        cents = cents.ljust(2, '0')
+        return f"{int(euros)}{currency_symbol}" if cents == "00" else f"{int(euros)}.{cents}{currency_symbol}"
+    try:
+        price_value = float(raw_price_str)
+        return f"{int(price_value)}{currency_symbol}" if price_value == int(price_value) else f"{price_value:.2f}{currency_symbol}"
+    except ValueError:
+        return raw_price_str.replace(" EUR", "€")
+
+def format_price(element, currency):
+    """Formats a feed price element for display, or returns "" if it is missing."""
+    if element is None or element.text is None: return ""
+    return format_price_text(element.text.split()[0], currency)
+
 def download_feed_xml(country_code, url):
-    """Downloads the XML feed and saves it to a temporary directory."""
+    """Downloads the XML feed and saves it to a temporary directory (revalidating any previous download)."""
     os.makedirs(TEMP_DOWNLOAD_DIR, exist_ok=True)
     filename = f"{country_code.lower()}_feed.xml"
     file_path = os.path.join(TEMP_DOWNLOAD_DIR, filename)
+    validators_path = f"{file_path}.validators.json"
+
+    # Conditional GET: if the feed is still on disk from a previous run, the server
+    # can answer 304 Not Modified instead of sending the whole body again
+    headers = {}
+    if os.path.exists(file_path):
+        try:
+            with open(validators_path, 'r', encoding='utf-8') as f:
+                validators = json.load(f)
+        except (OSError, ValueError):
+            # Missing or unreadable validators just mean a full download
+            validators = {}
+        if not isinstance(validators, dict):
+            validators = {}
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
     
     print(f"Downloading feed for {country_code} from: {url}")
     try:
-        feed_response = requests.get(url, timeout=30)
-        feed_response.raise_for_status()
-        with open(file_path, 'wb') as f:
-            f.write(feed_response.content)
+        # Stream the body to disk in chunks instead of buffering the whole feed in memory first
+        with SESSION.get(url, timeout=30, stream=True, headers=headers) as feed_response:
+            if feed_response.status_code == 304:
+                print(f"Feed for {country_code} not modified; reusing {file_path}")
+                return file_path
+            feed_response.raise_for_status()
+            # Written via a temp file + rename, so an interrupted download never leaves a
+            # truncated feed that a later 304 would vouch for
+            tmp_path = f"{file_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                for chunk in feed_response.iter_content(chunk_size=1024 * 1024):
+                    f.write(chunk)
+            os.replace(tmp_path, file_path)
+            # The validators go through a temp file + rename too, so they are never left half-written
+            tmp_validators_path = f"{validators_path}.tmp"
+            with open(tmp_validators_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'etag': feed_response.headers.get('ETag'),
+                    'last_modified': feed_response.headers.get('Last-Modified')
+                }, f)
+            os.replace(tmp_validators_path, validators_path)
         return file_path
     except requests.exceptions.RequestException as e:
         print(f"FATAL ERROR: Could not download feed for {country_code}. {e}")
         return None
 
+def image_cache_path(url):
+    """Returns where a product image's downloaded bytes are cached on disk."""
+    return os.path.join(IMAGE_CACHE_DIR, hashlib.sha1(url.encode()).hexdigest())
+
+def fetch_image_bytes(url):
+    """Returns a product image's raw bytes, from the on-disk cache if it was downloaded before."""
+    cache_path = image_cache_path(url)
+    if os.path.exists(cache_path):
+        with open(cache_path, 'rb') as f:
+            return f.read()
+
+    # Streamed, so an oversized (misconfigured) source is rejected from its headers or
+    # after the first chunks past the cap, instead of being loaded whole into memory
+    with SESSION.get(url, timeout=10, stream=True) as response:
+        response.raise_for_status()
+        if int(response.headers.get('Content-Length') or 0) > MAX_IMAGE_BYTES:
+            raise ValueError(f"image is larger than {MAX_IMAGE_BYTES} bytes")
+        buffer = BytesIO()
+        for chunk in response.iter_content(chunk_size=256 * 1024):
+            buffer.write(chunk)
+            if buffer.tell() > MAX_IMAGE_BYTES:
+                raise ValueError(f"image is larger than {MAX_IMAGE_BYTES} bytes")
+    image_bytes = buffer.getvalue()
+
+    # Write-through via a temp file + rename, so a concurrent reader never sees a partial image
+    os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(image_bytes)
+    os.replace(tmp_path, cache_path)
+    return image_bytes
+
+@lru_cache(maxsize=256)
+def measure_price_text(price_text):
+    """Returns the (width, height) used to center a price string; memoized since many products share a price."""
+    _, _, w, h = PRICE_FONT.getbbox(price_text)
+    return w, h
+
+@lru_cache(maxsize=256)
+def render_price_sprite(price_text, price_color):
+    """Rasterizes a centered price string once per (text, color); returns the RGBA sprite and its paste origin."""
+    price_conf = LAYOUT_CONFIG["price"]
+    w, h = measure_price_text(price_text)
+    text_x = price_conf["x"] - (w / 2)
+    text_y = price_conf["y"] - (h / 2)
+    # Paste positions are whole pixels, so the sub-pixel part of the centered
+    # position is applied while rasterizing, exactly as draw.text() would
+    origin = (math.floor(text_x), math.floor(text_y))
+    sprite = Image.new("RGBA", (w + 2, h + 2), ImageColor.getrgb(price_color) + (0,))
+    ImageDraw.Draw(sprite).text((text_x - origin[0], text_y - origin[1]), price_text, fill=price_color, font=PRICE_FONT)
+    return sprite, origin
+
+@lru_cache(maxsize=None)
+def render_fingerprint():
+    """Hashes everything besides the per-product inputs that shapes an ad: render version, Pillow build, layout, JPEG settings, template and font."""
+    render_settings = (RENDER_VERSION, Image.__version__, LAYOUT_CONFIG, JPEG_SAVE_OPTIONS)
+    fingerprint = hashlib.blake2b(repr(render_settings).encode(), digest_size=16)
+    for path in (LAYOUT_CONFIG["template_path"], LAYOUT_CONFIG["price"]["font_path"]):
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                fingerprint.update(f.read())
+    return fingerprint.hexdigest()
+
+def ad_cache_key(image_urls, price_text, price_color):
+    """Identifies the exact inputs an ad is rendered from, so unchanged ads can be skipped on re-runs."""
+    key_source = "|".join([render_fingerprint(), *image_urls, price_text, price_color])
+    return hashlib.blake2b(key_source.encode(), digest_size=16).hexdigest()
+
+@lru_cache(maxsize=32)
+def load_slot_image(url, target_size, center_y):
+    """Downloads, decodes and fits one product image to a slot; memoized since products often share images."""
+    image_bytes = fetch_image_bytes(url)
+    try:
+        return fit_slot_image(image_bytes, target_size, center_y)
+    except Exception:
+        # Bytes that do not decode (an HTML error page, a truncated or non-image body) are
+        # dropped from the image cache, so the next run downloads them again instead of
+        # failing this slot forever
+        try:
+            os.remove(image_cache_path(url))
+        except FileNotFoundError:
+            pass
+        raise
+
+def fit_slot_image(image_bytes, target_size, center_y):
+    """Decodes one product image and crops/scales it to a slot; returns (fitted_img, has_alpha)."""
+    img = Image.open(BytesIO(image_bytes))
+    slot_w, slot_h = target_size
+    # Let libjpeg decode at a reduced DCT scale (1/2, 1/4, 1/8) that is still
+    # at least 2x the slot size; no-op for non-JPEG sources.
+    img.draft("RGB", (slot_w * 2, slot_h * 2))
+    # Opaque photos (JPEG) stay RGB: 3 channels through LANCZOS and a plain copy on
+    # paste. Only sources with real transparency take the RGBA + alpha-mask path: an
+    # alpha channel, or a tRNS transparency entry (palette index or RGB/L colour key).
+    has_alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+    img = img.convert("RGBA" if has_alpha else "RGB")
+    # Crop box with the slot's aspect ratio, in source pixels (the region ImageOps.fit would keep)
+    if img.width * slot_h > img.height * slot_w:
+        crop_w, crop_h = img.height * slot_w / slot_h, img.height
+    else:
+        crop_w, crop_h = img.width, img.width * slot_h / slot_w
+    left = (img.width - crop_w) * 0.5
+    top = (img.height - crop_h) * center_y
+    # Crop and scale in one pass: reducing_gap lets Pillow box-reduce by an integer
+    # factor first (keeping 2x headroom), so LANCZOS only runs over ~2x the slot's pixels
+    # and no intermediate full-size image is allocated.
+    fitted_img = img.resize(
+        target_size, Image.Resampling.LANCZOS, box=(left, top, left + crop_w, top + crop_h), reducing_gap=2.0
+    )
+    return fitted_img, has_alpha
+
+def init_ad_worker():
+    """Gives each ad worker process its own HTTP session (pooled sockets must not be shared across a fork)."""
+    global SESSION
+    SESSION = create_http_session()
+
 def create_ballzy_ad(image_urls, price_text, product_id, price_color):
     """Generates the single stylized image based on the Ballzy layout."""
     
-    try:
-        base = Image.open(LAYOUT_CONFIG["template_path"]).convert("RGBA")
-    except FileNotFoundError:
-        base = Image.new('RGBA', LAYOUT_CONFIG["canvas_size"], (255, 255, 255, 255))
-        
-    for i, slot in enumerate(LAYOUT_CONFIG["slots"]):
-        if i >= len(image_urls): continue
-        url = image_urls[i]
+    image_urls = image_urls[:len(SLOT_PLACEMENTS)]
+    output_path = os.path.join(OUTPUT_DIR, f"ad_{product_id}.jpg")
+    meta_path = os.path.join(AD_CACHE_DIR, f"ad_{product_id}.meta")
+    cache_key = ad_cache_key(image_urls, price_text, price_color)
+
+    # 0. Skip the ad entirely if it was already rendered from identical inputs
+    if os.path.exists(output_path) and os.path.exists(meta_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            if f.read().strip() == cache_key:
+                return output_path
+
+    base = TEMPLATE_IMAGE.copy()
+    all_slots_ok = True
+
+    # 1. Download and fit all slot images concurrently (latency = slowest image, not the sum)
+    with ThreadPoolExecutor(max_workers=max(len(image_urls), 1)) as executor:
+        fitted_slots = [
+            executor.submit(load_slot_image, url, size, center_y)
+            for (_, size, center_y), url in zip(SLOT_PLACEMENTS, image_urls)
+        ]
+
+    # 2. Paste each image into its slot
+    for (offset, _, _), url, fitted_slot in zip(SLOT_PLACEMENTS, image_urls, fitted_slots):
         try:
-            response = requests.get(url, timeout=10)
-            img = Image.open(BytesIO(response.content)).convert("RGBA")
-            target_size = (slot['w'], slot['h'])
-            fitted_img = ImageOps.fit(
-                img, target_size, method=Image.Resampling.LANCZOS, centering=(0.5, slot.get("center_y", 0.5))
-            )
-            base.paste(fitted_img, (slot['x'], slot['y']), fitted_img)
+            fitted_img, has_alpha = fitted_slot.result()
+            base.paste(fitted_img, offset, fitted_img if has_alpha else None)
         except Exception as e:
+            all_slots_ok = False
             print(f"Error processing image {url} for product {product_id}: {e}")
 
     # 3. Draw the Price
@@ -142,190 +404,178 @@ def create_ballzy_ad(image_urls, price_text, product_id, price_color):
         width=5
     ) 
     
-    # Load Font
-    try:
-        font = ImageFont.truetype(price_conf["font_path"], price_conf["font_size"])
-    except:
-        font = ImageFont.load_default() 
-
-    # Draw the price text (using dynamic color)
-    _, _, w, h = draw.textbbox((0, 0), price_text, font=font)
-    text_x = price_conf["x"] - (w / 2)
-    text_y = price_conf["y"] - (h / 2)
-    draw.text((text_x, text_y), price_text, fill=price_color, font=font) 
-
-    # 4. Save Final Ad
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    output_path = os.path.join(OUTPUT_DIR, f"ad_{product_id}.jpg")
-    base.convert("RGB").save(output_path, format="JPEG", quality=95)
+    # Paste the price text (using dynamic color) from the pre-rendered sprite
+    sprite, sprite_origin = render_price_sprite(price_text, price_color)
+    base.paste(sprite, sprite_origin, sprite)
+
+    # 4. Save Final Ad (encoded in memory, then written in one go, so a failed encode never leaves a partial file)
+    buffer = BytesIO()
+    base.save(buffer, format="JPEG", **JPEG_SAVE_OPTIONS)
+    with open(output_path, 'wb') as f:
+        f.write(buffer.getbuffer())
+
+    # 5. Record the inputs; an ad with a failed slot is not recorded so the next run retries it
+    if all_slots_ok:
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            f.write(cache_key)
+    elif os.path.exists(meta_path):
+        os.remove(meta_path)
     return output_path
 
 # --- 3. CONTAMINATION REPORT LOGIC (FINALIZED and Streamlined) ---
 
-def create_estonian_contamination_report(xml_path):
-    """
-    Reads the full LT feed XML file and generates a CSV report of all products
-    whose g:description contains the STRICTEST Estonian markers (ö, ä, ü, õ).
-    
-    CRITICAL FIX: Uses the 'g:' namespace for ID, Title, Description, and Link.
-    """
-    # Use the NAMESPACES alias defined globally in your script
-    NS = {'g': 'http://base.google.com/ns/1.0'} 
-    import xml.etree.ElementTree as ET # Ensure ET is available
-    import csv # Ensure CSV is imported
+# 🟢 STRICT CORE DETECTION: Rely only on characters unique to Estonian
+ESTONIAN_MARKERS = ['ö', 'ä', 'ü', 'õ']
+# One case-insensitive character class: a single C-level scan per description, no lower() copy
+ESTONIAN_MARKER_PATTERN = re.compile('[' + ''.join(ESTONIAN_MARKERS) + ']', re.IGNORECASE)
 
-    if not os.path.exists(xml_path):
-        print(f"Error: XML file not found at {xml_path}")
-        return
+CONTAMINATION_REPORT_FILE = "LT_Estonian_Contamination_Report.csv"
+CONTAMINATION_REPORT_FIELDS = ['ID', 'Title', 'Description', 'Link']
 
-    REPORT_CSV_FILE = "LT_Estonian_Contamination_Report.csv"
-    
-    # 🟢 STRICT CORE DETECTION: Rely only on characters unique to Estonian
-    ESTONIAN_MARKERS = ['ö', 'ä', 'ü', 'õ']
+def contamination_report_row(item):
+    """
+    Returns the report row for a feed <item> whose g:description contains the
+    STRICTEST Estonian markers (ö, ä, ü, õ), or None if the item is clean.
+    """
+    # --- Data Extraction (namespaced g: tags for all report fields) ---
+    # One pass over the item's children instead of a find() per field (first occurrence wins, like find())
+    children = {}
+    for child in item:
+        children.setdefault(child.tag, child)
+
+    description_node = children.get(G_DESCRIPTION)
+    # Ensure text is not None before stripping
+    description_text = description_node.text.strip() if description_node is not None and description_node.text else ''
     
-    try:
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
-    except Exception as e:
-        print(f"Error parsing XML file {xml_path}: {e}")
-        return
-
-    product_elements = root.findall('./channel/item')
-    contaminated_products = []
+    # --- Contamination Check Logic (Strictly on Description Text) ---
+    # Check for any of the strict Estonian markers in the description text
+    if ESTONIAN_MARKER_PATTERN.search(description_text) is None:
+        return None
 
-    print(f"\n🔎 Starting final, namespaced contamination check on {len(product_elements)} products in LT feed...")
+    id_node = children.get(G_ID)
+    title_node = children.get(G_TITLE)
+    link_node = children.get(G_LINK)
+    return {
+        'ID': id_node.text if id_node is not None and id_node.text else 'N/A',
+        'Title': title_node.text.strip() if title_node is not None and title_node.text else '',
+        'Description': description_text.replace('\n', ' '), 
+        'Link': link_node.text.strip() if link_node is not None and link_node.text else ''
+    }
 
-    for item in product_elements:
-        # --- Data Extraction (FIXED to use NS for all report fields) ---
-        product_id = item.find('g:id', NS).text if item.find('g:id', NS) is not None and item.find('g:id', NS).text else 'N/A'
-        
-        # 💡 FIX: Use NS for title and link
-        title_node = item.find('g:title', NS) 
-        link_node = item.find('g:link', NS)
-        description_node = item.find('g:description', NS) 
-
-        # Ensure text is not None before stripping
-        title_text = title_node.text.strip() if title_node is not None and title_node.text else ''
-        link_text = link_node.text.strip() if link_node is not None and link_node.text else ''
-        description_text = description_node.text.strip() if description_node is not None and description_node.text else ''
-        
-        # --- Contamination Check Logic (Strictly on Description Text) ---
-        check_text = description_text.lower()
-        
-        # Check for any of the strict Estonian markers in the description text
-        is_contaminated = any(marker in check_text for marker in ESTONIAN_MARKERS)
-
-        if is_contaminated:
-            contaminated_products.append({
-                'ID': product_id,
-                'Title': title_text,
-                'Description': description_text.replace('\n', ' '), 
-                'Link': link_text 
-            })
-
-    # --- Write the Report CSV (GUARANTEED OUTPUT) ---
-    with open(REPORT_CSV_FILE, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['ID', 'Title', 'Description', 'Link']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        
-        writer.writeheader()
-        
-        if contaminated_products:
-            writer.writerows(contaminated_products)
-            print(f"⚠️ Successfully created contamination report: {REPORT_CSV_FILE} with {len(contaminated_products)} problematic products.")
-        else:
-            print(f"✅ Full report check completed. No highly contaminated products found. Report file created with headers only.")
+def print_contamination_summary(contaminated_count, checked_count):
+    """Logs the outcome of the LT contamination check once the report CSV is complete."""
+    print(f"\n🔎 Final, namespaced contamination check covered {checked_count} products in LT feed.")
+    if contaminated_count:
+        print(f"⚠️ Successfully created contamination report: {CONTAMINATION_REPORT_FILE} with {contaminated_count} problematic products.")
+    else:
+        print(f"✅ Full report check completed. No highly contaminated products found. Report file created with headers only.")
 
 # --- 4. FEED GENERATION LOGIC ---
 
+FEED_FOOTER = "</channel></rss>\n"
+
+def feed_header(title):
+    """Returns the XML declaration plus the opening <rss>/<channel> markup shared by the XML feeds."""
+    return (
+        "<?xml version='1.0' encoding='UTF-8'?>\n"
+        f'<rss xmlns:g="{NAMESPACES["g"]}" version="2.0"><channel>'
+        f"<title>{escape(title)}</title><link>{escape(GITHUB_PAGES_BASE_URL)}</link>"
+    )
+
+def xml_element(clark_tag, text):
+    """Serializes one flat feed node, writing the Google namespace as its g: prefix."""
+    tag = 'g:' + clark_tag[len(G_TAG_PREFIX):] if clark_tag.startswith(G_TAG_PREFIX) else clark_tag
+    return f"<{tag}>{escape(text or '')}</{tag}>"
+
+def serialize_node(node, text):
+    """Serializes one feed node for the Meta feed, with its (cleaned) text."""
+    tag = node.tag
+    # Flat g: or un-prefixed text nodes (nearly all of them) are written directly
+    if len(node) == 0 and not node.attrib and (tag.startswith(G_TAG_PREFIX) or not tag.startswith('{')):
+        return xml_element(tag, text)
+    # Anything else (nested g:shipping, attributes, other namespaces) is copied
+    # verbatim through lxml's serializer, like the original node append did
+    node.text = text
+    return ET.tostring(node, encoding='unicode', with_tail=False)
+
 def generate_meta_feed(processed_products, country_code):
     """Creates the final Meta XML feed."""
     META_FEED_FILENAME = f"ballzy_{country_code.lower()}_ad_feed.xml"
     
     print(f"\nCreating final Meta Feed for {country_code}: {META_FEED_FILENAME}")
     
-    # 1. Setup Root and Channel
-    ET.register_namespace('', 'http://www.w3.org/2005/Atom')
-    ET.register_namespace('g', 'http://base.google.com/ns/1.0')
-    rss = ET.Element('rss', version="2.0")
-    channel = ET.SubElement(rss, 'channel')
-    
-    ET.SubElement(channel, 'title').text = f"Ballzy Dynamic Ads Feed ({country_code})"
-    ET.SubElement(channel, 'link').text = GITHUB_PAGES_BASE_URL
+    # Each item's nodes were serialized once while parsing, so the XML is written
+    # directly as a stream of strings instead of building a second element tree.
+    with open(META_FEED_FILENAME, 'w', encoding='utf-8') as f:
+        # 1. Setup Root and Channel
+        f.write(feed_header(f"Ballzy Dynamic Ads Feed ({country_code})"))
 
-    for product_data in processed_products:
-        item = ET.SubElement(channel, 'item')
-        
-        # 2. Append all original nodes, excluding the old image link
-        for node in product_data['nodes']:
-            if node.tag == '{http://base.google.com/ns/1.0}image_link':
-                continue 
-            item.append(node)
-
-        # 3. Add the new image link node
-        new_image_link = f"{GITHUB_PAGES_BASE_URL}/ad_{product_data['id']}.jpg"
-        ET.SubElement(item, '{http://base.google.com/ns/1.0}image_link').text = new_image_link
-        
-    # 5. Save the resulting XML tree to a file
-    tree = ET.ElementTree(rss)
-    tree.write(META_FEED_FILENAME, encoding='utf-8', xml_declaration=True)
+        for product_data in processed_products:
+            f.write("<item>")
+            
+            # 2. Copy all original nodes, excluding the old image link
+            for tag, markup in product_data['nodes']:
+                if tag == G_IMAGE_LINK:
+                    continue 
+                f.write(markup)
+
+            # 3. Add the new image link node
+            new_image_link = f"{GITHUB_PAGES_BASE_URL}/ad_{product_data['id']}.jpg"
+            f.write(xml_element(G_IMAGE_LINK, new_image_link))
+            f.write("</item>")
+
+        f.write(FEED_FOOTER)
     
     print(f"Feed saved successfully: {META_FEED_FILENAME}")
 
+TIKTOK_REQUIRED_TAGS = (
+    'id', 'title', 'description', 'availability', 'condition', 
+    'price', 'link', 'brand', 
+    'item_group_id', 'google_product_category', 'product_type',
+    'sale_price', 'sale_price_effective_date', 'color', 'gender', 'size'
+)
+TIKTOK_CUSTOM_LABELS = tuple(f'custom_label_{i}' for i in range(5))
+TIKTOK_G_TAGS = {'id', 'title', 'description', 'price', 'sale_price', 'link', 'image_link', 'brand', *TIKTOK_CUSTOM_LABELS}
+# (source tag, output tag) pairs in feed order; g: fields are resolved to Clark notation once here
+TIKTOK_FIELDS = tuple(
+    (tag_name, G_TAG_PREFIX + tag_name if tag_name in TIKTOK_G_TAGS else tag_name)
+    for tag_name in TIKTOK_REQUIRED_TAGS + TIKTOK_CUSTOM_LABELS
+)
+
 def generate_tiktok_feed(processed_products, country_code):
     """Creates the final TikTok XML feed."""
     TIKTOK_FEED_FILENAME = f"ballzy_tiktok_{country_code.lower()}_ad_feed.xml"
     
     print(f"\nCreating TikTok XML Feed for {country_code}: {TIKTOK_FEED_FILENAME}")
     
-    # 1. Setup Root and Channel
-    ET.register_namespace('', 'http://www.w3.org/2005/Atom')
-    ET.register_namespace('g', 'http://base.google.com/ns/1.0')
-    rss = ET.Element('rss', version="2.0", attrib={'xmlns:g': NAMESPACES['g']})
-    channel = ET.SubElement(rss, 'channel')
-    
-    ET.SubElement(channel, 'title').text = f"Ballzy Dynamic TikTok Feed ({country_code})"
-    ET.SubElement(channel, 'link').text = GITHUB_PAGES_BASE_URL
-
-    tiktok_required_tags = [
-        'id', 'title', 'description', 'availability', 'condition', 
-        'price', 'link', 'brand', 
-        'item_group_id', 'google_product_category', 'product_type',
-        'sale_price', 'sale_price_effective_date', 'color', 'gender', 'size'
-    ]
-    
-    tiktok_custom_labels = [f'custom_label_{i}' for i in range(5)]
-
-    for product_data in processed_products:
-        item = ET.SubElement(channel, 'item')
-        
-        def get_element(tag_name):
-            return product_data['item_elements'].get(tag_name)
+    # Streamed as strings, like the Meta feed, instead of building an element tree first
+    with open(TIKTOK_FEED_FILENAME, 'w', encoding='utf-8') as f:
+        # 1. Setup Root and Channel (the g: prefix is declared once on the root)
+        f.write(feed_header(f"Ballzy Dynamic TikTok Feed ({country_code})"))
 
-        for tag_name in tiktok_required_tags + tiktok_custom_labels:
-            node = get_element(tag_name)
+        for product_data in processed_products:
+            f.write("<item>")
             
-            if node is not None and node.text and node.text.strip():
-                prefix = 'g:' if tag_name in ['id', 'title', 'description', 'price', 'sale_price', 'link', 'image_link', 'brand'] or tag_name.startswith('custom_label') else ''
-                clean_text_content = node.text 
+            fields = product_data['fields']
+
+            # 2. Copy the TikTok fields that have a value
+            for tag_name, output_tag in TIKTOK_FIELDS:
+                text = fields.get(tag_name)
                 
-                if prefix == 'g:':
-                    ET.SubElement(item, '{' + NAMESPACES['g'] + '}' + tag_name).text = clean_text_content
-                else:
-                    ET.SubElement(item, tag_name).text = clean_text_content
-        
-        # 3. Add the NEW IMAGE LINK
-        new_image_link = f"{GITHUB_PAGES_BASE_URL}/ad_{product_data['id']}.jpg"
-        ET.SubElement(item, '{' + NAMESPACES['g'] + '}' + 'image_link').text = new_image_link
-
-        # 4. Add additional image links (Optional but useful)
-        additional_images = product_data['item_elements'].get('additional_image_link')
-        if additional_images is not None and additional_images.text:
-            ET.SubElement(item, '{' + NAMESPACES['g'] + '}' + 'additional_image_link').text = additional_images.text
-
-    # 5. Save the resulting XML tree to a file
-    tree = ET.ElementTree(rss)
-    tree.write(TIKTOK_FEED_FILENAME, encoding='utf-8', xml_declaration=True)
+                if text and text.strip():
+                    f.write(xml_element(output_tag, text))
+            
+            # 3. Add the NEW IMAGE LINK
+            new_image_link = f"{GITHUB_PAGES_BASE_URL}/ad_{product_data['id']}.jpg"
+            f.write(xml_element(G_IMAGE_LINK, new_image_link))
+
+            # 4. Add additional image links (Optional but useful)
+            additional_images = fields.get('additional_image_link')
+            if additional_images:
+                f.write(xml_element(G_ADDITIONAL_IMAGE_LINK, additional_images))
+            f.write("</item>")
+
+        f.write(FEED_FOOTER)
     
     print(f"Feed saved successfully: {TIKTOK_FEED_FILENAME}")
 
@@ -343,190 +593,273 @@ def generate_google_feed(processed_products, country_code):
         "iOS app link", "iOS app store ID", "Formatted price", "Formatted sale price"
     ]
 
-    with open(GOOGLE_FEED_FILENAME, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=HEADERS)
-        writer.writeheader()
+    rows = []
+    for product_data in processed_products:
+        
+        fields = product_data['fields']
 
-        for product_data in processed_products:
-            
-            def get_value(tag_name):
-                node = product_data['item_elements'].get(tag_name)
-                # Check for node and text existence to prevent AttributeError
-                return node.text.strip() if node is not None and node.text is not None else '' 
-
-            # 1. Map Contextual Keywords
-            keywords_list = []
-            keywords_list.append(get_value('brand'))
-            keywords_list.append(get_value('color'))
-            
-            for i in range(5):
-                 keywords_list.append(get_value(f'custom_label_{i}'))
+        def get_value(tag_name):
+            return fields.get(tag_name, '').strip()
 
-            contextual_keywords = ','.join(filter(None, keywords_list))
-            
-            # 2. Build the Row
-            row = {
-                "ID": get_value('id'),
-                "ID2": "", 
-                "Item title": get_value('title'),
-                "Final URL": get_value('link'),
-                "Image URL": f"{GITHUB_PAGES_BASE_URL}/ad_{product_data['id']}.jpg",
-                "Item subtitle": "", 
-                "Item Description": get_value('description'),
-                "Item category": get_value('google_product_category') or get_value('category'), # Handle g:category too
-                "Price": get_value('price'),
-                "Sale price": get_value('sale_price'), 
-                "Contextual keywords": contextual_keywords,
-                "Formatted price": product_data['formatted_price'],
-                "Formatted sale price": product_data['formatted_sale_price'],
-                # All other fields remain empty
-                "Item address": "", "Tracking template": "", "Custom parameter": "", 
-                "Final mobile URL": "", "Android app link": "", "iOS app link": "", 
-                "iOS app store ID": ""
-            }
-            
-            writer.writerow(row)
+        # 1. Map Contextual Keywords
+        keywords_list = []
+        keywords_list.append(get_value('brand'))
+        keywords_list.append(get_value('color'))
+        
+        for i in range(5):
+             keywords_list.append(get_value(f'custom_label_{i}'))
+
+        contextual_keywords = ','.join(filter(None, keywords_list))
+        
+        # 2. Build the Row (a plain tuple in HEADERS order; empty strings are unused columns)
+        rows.append((
+            get_value('id'),                                                    # ID
+            "",                                                                 # ID2
+            get_value('title'),                                                 # Item title
+            get_value('link'),                                                  # Final URL
+            f"{GITHUB_PAGES_BASE_URL}/ad_{product_data['id']}.jpg",             # Image URL
+            "",                                                                 # Item subtitle
+            get_value('description'),                                           # Item Description
+            get_value('google_product_category') or get_value('category'),      # Item category (handles g:category too)
+            get_value('price'),                                                 # Price
+            get_value('sale_price'),                                            # Sale price
+            contextual_keywords,                                                # Contextual keywords
+            "", "", "", "", "", "", "",                                         # Item address ... iOS app store ID
+            product_data['formatted_price'],                                    # Formatted price
+            product_data['formatted_sale_price'],                               # Formatted sale price
+        ))
+
+    # 3. Write header and rows in one go; csv.writer skips DictWriter's per-field dict lookups
+    with open(GOOGLE_FEED_FILENAME, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(HEADERS)
+        writer.writerows(rows)
             
     print(f"CSV Feed saved successfully: {GOOGLE_FEED_FILENAME}")
 
-def process_single_feed(country_code, config, xml_file_path):
-    """Downloads, processes, and generates all required feeds for a single country."""
+def iter_feed_items(xml_file_path):
+    """Stream-parses the feed file, yielding one <item> at a time and freeing it afterwards."""
+    # Comments and processing instructions are dropped like the stdlib parser did, so
+    # every child of an item is a real element with a string tag
+    for _, item in ET.iterparse(
+        xml_file_path, events=('end',), tag='item', remove_comments=True, remove_pis=True
+    ):
+        yield item
+        # Drop the processed item and all earlier siblings so memory stays flat
+        item.clear()
+        while item.getprevious() is not None:
+            del item.getparent()[0]
+
+def extract_product(item, config):
+    """
+    Applies the category/Lifestyle filter to a single feed <item> and extracts
+    everything needed for the feeds and the ad image.
+
+    Returns (product_data, ad_job), or None if the item is skipped.
+    """
+    product_id_element = item.find(G_ID)
+    if product_id_element is None or product_id_element.text is None: return None
+    product_id = product_id_element.text.strip()
+    
+    # --- PRODUCT FILTERING LOGIC ---
+    # The Lifestyle label is the cheaper and more selective test, so it runs first
+    # and most items are rejected before any category lookup.
+
+    # 🟢 FIX: Use un-prefixed tag for custom_label_0 (Confirmed by client)
+    label_element = item.find('custom_label_0') 
+    
+    # Use the robust check (strip and lower()) to catch variations
+    if label_element is None or label_element.text is None or label_element.text.strip().lower() != "lifestyle":
+        return None
+
+    # 1. Try specific Google tag
+    category_element = item.find(G_GOOGLE_PRODUCT_CATEGORY)
+    
+    # 2. Try the general Google category tag (LV/LT/FI FIX)
+    if category_element is None:
+         category_element = item.find(G_CATEGORY)
+
+    # 3. Try the un-prefixed specific tag
+    if category_element is None:
+         category_element = item.find('google_product_category')
+         
+    if category_element is None or category_element.text is None:
+        return None
+
+    # Check for English terms
+    category_text = category_element.text.strip().lower()
+    if "street shoes" not in category_text and "boots" not in category_text:
+        return None
+        
+    # Store every field's text by tag name for easy CSV mapping, plus the ordered
+    # (tag, serialized node) pairs for the Meta feed, cleaning up text along the way.
+    # Only plain strings are kept, so no product holds on to parts of the parsed document.
+    # The same pass picks out the price and image elements, instead of a separate
+    # find() scan over the children for each of them.
+    fields = {}
+    nodes = []
+    sale_price_element = None
+    price_element = None
+    main_image = None
+    additional_images = []
+    for node in item:
+        tag = node.tag
+        tag_name = tag.split('}')[-1]
+        text = node.text
+
+        if tag == G_SALE_PRICE:
+            if sale_price_element is None: sale_price_element = node
+        elif tag == G_PRICE:
+            if price_element is None: price_element = node
+        elif tag == G_IMAGE_LINK:
+            if main_image is None: main_image = node
+        elif tag == G_ADDITIONAL_IMAGE_LINK:
+            additional_images.append(node)
+        
+        if tag_name in ['description', 'title', 'link']:
+            text = clean_text(text)
+
+        fields[tag_name] = text or ''
+        nodes.append((tag, serialize_node(node, text)))
+
+    # --- Price Extraction and Formatting ---
+    if sale_price_element is not None:
+        final_price_color = SALE_PRICE_COLOR
+        price_state = "sale"
+    elif price_element is not None:
+        final_price_color = NORMAL_PRICE_COLOR
+        price_state = "normal"
+    else:
+        return None
+        
+    formatted_price = format_price(price_element, config['currency'])
+    formatted_sale_price = format_price(sale_price_element, config['currency'])
+    formatted_display_price = formatted_sale_price if price_state == "sale" else formatted_price
+    
+    # --- Image Link Extraction ---
+    image_urls = []
+    if main_image is not None and main_image.text:
+        image_urls.append(main_image.text.strip())
+
+    for i, img in enumerate(additional_images):
+        if i < 2 and img.text: image_urls.append(img.text.strip())
+        
+    if not image_urls: return None
+
+    product_data = {
+        'id': product_id,
+        'price_state': price_state, 
+        'formatted_price': formatted_price,
+        'formatted_sale_price': formatted_sale_price,
+        'fields': fields,
+        'nodes': nodes
+    }
+    ad_job = (image_urls[:3], formatted_display_price, product_id, final_price_color)
+    return product_data, ad_job
+
+def cancel_queued_ads(ad_futures, rendering_ads):
+    """Cancels a failed country's not-yet-started ads, handing their product IDs back to any earlier country's ad."""
+    # Newest first, so a product queued twice ends up back at its oldest entry
+    for product_id, ad_future, previous_ad in reversed(ad_futures):
+        if ad_future.cancel() and rendering_ads.get(product_id) is ad_future:
+            if previous_ad is None:
+                del rendering_ads[product_id]
+            else:
+                rendering_ads[product_id] = previous_ad
+
+def process_single_feed(country_code, config, xml_file_path, executor, rendering_ads, contamination_report=False):
+    """
+    Processes and generates all required feeds for a single country.
+
+    Ads are queued on the shared executor and tracked in rendering_ads
+    (product ID -> future); the caller waits for them. With
+    contamination_report, the same parse also scans every item of the feed
+    for the Estonian contamination report.
+    """
     
     # 🟢 FIX: Initialize variables at the start to prevent NameError
     product_count = 0
+    checked_count = 0
+    contaminated_count = 0
     products_for_feed = []
+    ad_futures = []
     
     print(f"\nProcessing feed for {country_code} from local file: {xml_file_path}")
 
-    try:
-        # Load from the file path provided by the main function
-        tree = ET.parse(xml_file_path)
-        root = tree.getroot()
-    except ET.ParseError as e:
-        print(f"FATAL ERROR: Could not parse XML feed for {country_code}. {e}")
-        return
-    except FileNotFoundError:
-        print(f"FATAL ERROR: XML file not found for {country_code}.")
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    os.makedirs(AD_CACHE_DIR, exist_ok=True)
+
+    # The contamination report (GUARANTEED OUTPUT) is written row by row as the feed is scanned,
+    # into a temp file that only replaces the report once the whole feed has parsed
+    report_tmp_path = f"{CONTAMINATION_REPORT_FILE}.tmp"
+    report_file = open(report_tmp_path, 'w', newline='', encoding='utf-8') if contamination_report else nullcontext()
+    parse_error = None
+    with report_file as report_csv:
+        if contamination_report:
+            report_writer = csv.DictWriter(report_csv, fieldnames=CONTAMINATION_REPORT_FIELDS)
+            report_writer.writeheader()
+
+        try:
+            # Items are parsed one at a time; parsing stops as soon as enough products matched,
+            # unless the contamination report still needs to see the rest of the feed
+            for item in iter_feed_items(xml_file_path):
+                if contamination_report:
+                    # Checked on every item, including those past the product limit
+                    checked_count += 1
+                    row = contamination_report_row(item)
+                    if row:
+                        report_writer.writerow(row)
+                        contaminated_count += 1
+
+                if product_count >= MAX_PRODUCTS_TO_GENERATE:
+                    if not contamination_report:
+                        break
+                    continue
+
+                extracted = extract_product(item, config)
+                if extracted is None:
+                    continue
+
+                product_data, ad_job = extracted
+                products_for_feed.append(product_data)
+                # Queue Image Generation. Ads are named by product ID: if another country's
+                # ad with the same ID is still rendering, let it finish first, so the later
+                # country's ad still wins and two workers never write the same file.
+                previous_ad = rendering_ads.get(product_data['id'])
+                if previous_ad is not None and not previous_ad.cancelled():
+                    previous_ad.result()
+                ad_future = executor.submit(create_ballzy_ad, *ad_job)
+                rendering_ads[product_data['id']] = ad_future
+                ad_futures.append((product_data['id'], ad_future, previous_ad))
+                product_count += 1
+        except ET.ParseError as e:
+            parse_error = f"Could not parse XML feed for {country_code}. {e}"
+        except FileNotFoundError:
+            parse_error = f"XML file not found for {country_code}."
+
+    if parse_error:
+        cancel_queued_ads(ad_futures, rendering_ads)
+        if contamination_report:
+            os.remove(report_tmp_path)
+        print(f"FATAL ERROR: {parse_error}")
         return
 
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    
-    for item in root.iter('item'): 
-        if product_count >= MAX_PRODUCTS_TO_GENERATE:
-            break
-            
-        product_id_element = item.find('g:id', NAMESPACES)
-        if product_id_element is None or product_id_element.text is None: continue
-        product_id = product_id_element.text.strip()
-        
-        # --- PRODUCT FILTERING LOGIC ---
-        is_correct_category = False
-        category_element = None
-        
-        # 1. Try specific Google tag
-        category_element = item.find('g:google_product_category', NAMESPACES)
-        
-        # 2. Try the general Google category tag (LV/LT/FI FIX)
-        if category_element is None:
-             category_element = item.find('g:category', NAMESPACES)
-
-        # 3. Try the un-prefixed specific tag
-        if category_element is None:
-             category_element = item.find('google_product_category', NAMESPACES)
-             
-        if category_element is not None and category_element.text is not None:
-            category_text = category_element.text.strip().lower()
-            
-            # Check for English terms
-            if "street shoes" in category_text or "boots" in category_text:
-                is_correct_category = True
-        
-        # 🟢 FIX: Use un-prefixed tag for custom_label_0 (Confirmed by client)
-        label_element = item.find('custom_label_0', NAMESPACES) 
-        is_lifestyle = False
-        
-        if label_element is not None and label_element.text is not None: 
-            # Use the robust check (strip and lower()) to catch variations
-            if label_element.text.strip().lower() == "lifestyle": 
-                is_lifestyle = True
-            
-        if not is_correct_category or not is_lifestyle:
-            continue
-            
-        # --- Price Extraction and Formatting ---
-        sale_price_element = item.find('g:sale_price', NAMESPACES)
-        price_element = item.find('g:price', NAMESPACES)
-
-        if sale_price_element is not None:
-            display_price_element = sale_price_element
-            final_price_color = SALE_PRICE_COLOR
-            price_state = "sale"
-        elif price_element is not None:
-            display_price_element = price_element
-            final_price_color = NORMAL_PRICE_COLOR
-            price_state = "normal"
-        else:
-            continue
-            
-        def format_price(element):
-            if element is None or element.text is None: return ""
-            raw_price_str = element.text.split()[0]
-            try:
-                price_value = float(raw_price_str)
-                currency_symbol = config['currency'].replace("EUR", "€") 
-                return f"{int(price_value)}{currency_symbol}" if price_value == int(price_value) else f"{price_value:.2f}{currency_symbol}"
-            except ValueError:
-                return raw_price_str.replace(" EUR", "€")
-
-        formatted_display_price = format_price(display_price_element)
-        
-        # --- Image Link Extraction ---
-        image_urls = []
-        main_image = item.find('g:image_link', NAMESPACES)
-        if main_image is not None and main_image.text:
-            image_urls.append(main_image.text.strip())
-
-        additional_images = item.findall('g:additional_image_link', NAMESPACES)
-        for i, img in enumerate(additional_images):
-            if i < 2 and img.text: image_urls.append(img.text.strip())
-            
-        if not image_urls: continue
-        
-        # Store all elements as a dictionary for easy CSV mapping and clean up nodes
-        item_elements = {}
-        for node in item:
-            tag_name = node.tag.split('}')[-1]
-            item_elements[tag_name] = node
-            
-            if tag_name in ['description', 'title', 'link']:
-                node.text = clean_text(node.text)
-
-        products_for_feed.append({
-            'id': product_id,
-            'price_state': price_state, 
-            'formatted_price': format_price(price_element),
-            'formatted_sale_price': format_price(sale_price_element),
-            'item_elements': item_elements,
-            'nodes': list(item)
-        })
-
-        # Generate Image 
-        image_urls_for_ad = image_urls[:3]
-        create_ballzy_ad(image_urls_for_ad, formatted_display_price, product_id, final_price_color)
-        product_count += 1
-        
+    if contamination_report:
+        os.replace(report_tmp_path, CONTAMINATION_REPORT_FILE)
+        print_contamination_summary(contaminated_count, checked_count)
+
     # --- Execute Feed Generation (using the country code) ---
     if products_for_feed:
         # 1. Meta XML
         generate_meta_feed(products_for_feed, country_code)
-        
+    
         # 2. Google CSV
         if config['google_feed_required']:
             generate_google_feed(products_for_feed, country_code)
-            
+        
         # 3. TikTok XML
         generate_tiktok_feed(products_for_feed, country_code)
-        
+    
     else:
         print(f"No products matched filtering criteria for {country_code}. No feeds generated.")
 
@@ -534,28 +867,41 @@ def process_all_feeds(country_configs):
     """Main entry point to iterate and process all configured countries."""
     print("Starting Multi-Country Feed Generation...")
     
-    # --- Step 1: Download all feeds first ---
+    # --- Step 1: Download all feeds first (concurrently; each one is pure network wait) ---
     downloaded_files = {}
-    for code, config in country_configs.items():
-        file_path = download_feed_xml(code, config['feed_url'])
-        if file_path:
-            downloaded_files[code] = file_path
+    with ThreadPoolExecutor(max_workers=max(len(country_configs), 1)) as executor:
+        file_paths = executor.map(
+            lambda item: download_feed_xml(item[0], item[1]['feed_url']), country_configs.items()
+        )
+        for code, file_path in zip(country_configs, file_paths):
+            if file_path:
+                downloaded_files[code] = file_path
     
     print("-" * 50)
 
-    # --- Step 2: Run Contamination Report for LT (on the full file) ---
-    if 'LT' in downloaded_files:
-        create_estonian_contamination_report(downloaded_files['LT'])
-        print("-" * 50)
-        
-    # --- Step 3: Process individual feeds with filtering/limits ---
-    for code, config in country_configs.items():
-        if code in downloaded_files:
-            process_single_feed(code, config, downloaded_files[code])
-            print("-" * 50)
-        else:
-            print(f"Skipping processing for {code} due to previous download error.")
-            print("-" * 50)
+    # --- Step 2: Process individual feeds with filtering/limits ---
+    # Each ad is independent (own output file), so ads are rendered in worker
+    # processes: the Python-side glue around the Pillow kernels then scales
+    # across cores too, not just the parts that release the GIL. One pool serves
+    # all countries and ads are queued as soon as their item is parsed, so one
+    # country's ads keep rendering while the next feeds are parsed and written.
+    # The LT Contamination Report (on the full file) is built during LT's own parse
+    rendering_ads = {}
+    with ProcessPoolExecutor(max_workers=MAX_AD_WORKERS, initializer=init_ad_worker) as executor:
+        for code, config in country_configs.items():
+            if code in downloaded_files:
+                process_single_feed(
+                    code, config, downloaded_files[code], executor, rendering_ads, contamination_report=(code == 'LT')
+                )
+                print("-" * 50)
+            else:
+                print(f"Skipping processing for {code} due to previous download error.")
+                print("-" * 50)
+
+        # Surface any unexpected rendering error, as the feeds reference every ad
+        for ad_future in rendering_ads.values():
+            if not ad_future.cancelled():
+                ad_future.result()
 
     print("All Feeds Generated.")
 